@@ -17,24 +17,28 @@ import joblib
 import time
 from typing import List, Dict
 
+NSE_HOME_URL = "https://www.nseindia.com/"
+NSE_INDEX_API_URL = "https://www.nseindia.com/api/equity-stockIndices"
+
 class WebScraper:
     def __init__(self, use_selenium: bool = False):
         self.use_selenium = use_selenium
+        self.driver = None
+        # Reuse TCP/TLS connections across static scrapes
+        self.session = requests.Session()
+        self.session.headers.update({'User-Agent': 'Mozilla/5.0'})
         if use_selenium:
             self.options = Options()
             self.options.add_argument('--headless')
             self.options.add_argument('--no-sandbox')
             self.options.add_argument('--disable-dev-shm-usage')
-            self.driver = None
+            # Don't wait for images/stylesheets, the table is in the DOM
+            self.options.page_load_strategy = 'eager'
 
     def setup_selenium(self):
-        """Setup Selenium for headless Chrome"""
-        if self.use_selenium:
-            chrome_options = Options()
-            chrome_options.add_argument('--headless')
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            self.driver = webdriver.Chrome(options=chrome_options)
+        """Setup Selenium for headless Chrome (no-op if already running)"""
+        if self.use_selenium and self.driver is None:
+            self.driver = webdriver.Chrome(options=self.options)
 
     def stop_selenium(self):
         if self.driver:
@@ -47,12 +51,45 @@ class WebScraper:
             return self._scrape_dynamic(url)
         return self._scrape_static(url)
 
+    def scrape_stocks_batch(self, urls: List[str]) -> Dict[str, List[Dict]]:
+        """Scrape several URLs, reusing one browser/session for all of them"""
+        return {url: self.scrape_stocks(url) for url in urls}
+
+    def scrape_index(self, index: str = 'NIFTY 50') -> List[Dict]:
+        """Fetch index constituents from NSE's JSON API (no browser needed)"""
+        try:
+            # The API only answers sessions carrying NSE's cookies
+            if not self.session.cookies:
+                self.session.get(NSE_HOME_URL, timeout=10)
+
+            response = self.session.get(
+                NSE_INDEX_API_URL,
+                params={'index': index},
+                headers={'Referer': NSE_HOME_URL},
+                timeout=10
+            )
+            response.raise_for_status()
+
+            stocks = []
+            for row in response.json().get('data', []):
+                # First row is the index itself
+                if row.get('symbol') == index:
+                    continue
+                stocks.append({
+                    'symbol': row['symbol'],
+                    'price': row['lastPrice'],
+                    'change': row['pChange'],
+                    'volume': row['totalTradedVolume']
+                })
+
+            return stocks
+        except Exception as e:
+            print(f"Error fetching {index}: {str(e)}")
+            return []
+
     def _scrape_static(self, url: str) -> List[Dict]:
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0'
-            }
-            response = requests.get(url, headers=headers)
+            response = self.session.get(url)
             response.raise_for_status()
             soup = BeautifulSoup(response.text, 'html.parser')
 
@@ -77,8 +114,7 @@ class WebScraper:
 
     def _scrape_dynamic(self, url: str) -> List[Dict]:
         try:
-            if not self.driver:
-                self.setup_selenium()
+            self.setup_selenium()
 
             self.driver.get(url)
             WebDriverWait(self.driver, 10).until(
@@ -115,11 +151,19 @@ class StockPredictor:
         """Convert stock data to DataFrame and clean numeric fields"""
         df = pd.DataFrame(stocks)
 
-        df['price'] = df['price'].str.replace('$', '').astype(float)
-        df['volume'] = df['volume'].str.replace(',', '').astype(float)
-        df['change'] = df['change'].str.rstrip('%').astype(float) / 100
+        return df.assign(
+            price=self._to_float(df['price'], '$'),
+            volume=self._to_float(df['volume'], ','),
+            change=self._to_float(df['change'], '%') / 100
+        )
 
-        return df
+    @staticmethod
+    def _to_float(values: pd.Series, strip: str) -> pd.Series:
+        """Strip a formatting character and convert to float"""
+        # HTML scrapes give formatted strings, the JSON API gives numbers
+        if not pd.api.types.is_numeric_dtype(values):
+            values = values.str.replace(strip, '', regex=False)
+        return values.astype(float)
 
     def create_labels(self, df: pd.DataFrame) -> pd.DataFrame:
         """Create labels: 1 if stock went up, 0 if down"""
@@ -150,14 +194,12 @@ class StockPredictor:
         self.model = joblib.load(filename)
 
 def main():
-    url = "https://www.nseindia.com/market-data/live-equity-market"
-
-    scraper = WebScraper(use_selenium=True)
+    scraper = WebScraper()
     predictor = StockPredictor()
 
     try:
-        print("Scraping stock data...")
-        stocks = scraper.scrape_stocks(url)
+        print("Fetching stock data...")
+        stocks = scraper.scrape_index('NIFTY 50')
 
         if stocks:
             print("\nPreparing data...")
@@ -171,7 +213,7 @@ def main():
 
             print("\nModel saved as 'stock_predictor.joblib'")
         else:
-            print("No data was scraped. Please check the URL and selectors.")
+            print("No data was fetched. Please check the NSE API response.")
 
     finally:
         scraper.stop_selenium()
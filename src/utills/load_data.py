@@ -7,6 +7,8 @@ Loads stock data from the data/ folder for use in strategy scripts.
 import pandas as pd
 import os
 import glob
+import fnmatch
+from functools import lru_cache
 
 ###############################################################################
 # CONFIGURATION
@@ -19,6 +21,12 @@ NIFTY50_FOLDER = os.path.join(DATA_FOLDER, "nifty50")
 INDICES_FOLDER = os.path.join(DATA_FOLDER, "indices")
 CUSTOM_FOLDER = os.path.join(DATA_FOLDER, "custom")
 
+# Columns affected by DataLoader(price_dtype=...)
+PRICE_COLUMNS = ["Open", "High", "Low", "Close"]
+
+# Columns present in the downloaded CSVs that no strategy reads
+UNUSED_COLUMNS = {"Dividends", "Stock Splits"}
+
 ###############################################################################
 # DATA LOADER CLASS
 ###############################################################################
@@ -26,14 +34,106 @@ CUSTOM_FOLDER = os.path.join(DATA_FOLDER, "custom")
 class DataLoader:
     """Loads stock data from organized data folder"""
 
-    def __init__(self, base_folder=DATA_FOLDER):
-        """Initialize data loader"""
+    def __init__(self, base_folder=DATA_FOLDER, use_cache=True, price_dtype=None):
+        """
+        Initialize data loader
+
+        Parameters:
+        -----------
+        base_folder : str
+            Root data folder
+        use_cache : bool
+            Keep a Parquet copy next to each CSV and read that instead
+            of re-parsing the CSV on later runs
+        price_dtype : str or numpy dtype, optional
+            Cast OHLC columns to this dtype after loading (e.g. "float32"
+            to halve memory for indicator math). None keeps float64.
+        """
         self.base_folder = base_folder
+        self.use_cache = use_cache
+        self.price_dtype = price_dtype
+        self._dir_cache = {}
 
     def _clean_ticker_name(self, ticker):
         """Clean ticker symbol for filename"""
         return ticker.replace("^", "").replace("&", "and").replace(".", "_")
 
+    def _read_data_file(self, filepath):
+        """
+        Read a CSV data file, going through the Parquet cache if enabled
+
+        The Parquet copy's name carries the CSV's size and mtime, so it is
+        only used for that exact version of the CSV; a refreshed CSV with
+        an older mtime (cp -p, rsync -t, unpacked archives) still misses.
+        Without a Parquet engine (pyarrow/fastparquet) this is a plain
+        CSV read.
+        """
+        stem = os.path.splitext(filepath)[0]
+        stat = os.stat(filepath)
+        cache_path = f"{stem}.{stat.st_size}-{stat.st_mtime_ns}.parquet"
+
+        data = None
+
+        if self.use_cache and os.path.exists(cache_path):
+            try:
+                data = pd.read_parquet(cache_path)
+                data = data.drop(columns=UNUSED_COLUMNS, errors="ignore")
+            except Exception:
+                pass  # Unreadable cache, rebuild it from the CSV
+
+        if data is None:
+            data = pd.read_csv(
+                filepath,
+                index_col=0,
+                parse_dates=True,
+                usecols=lambda col: col not in UNUSED_COLUMNS
+            )
+
+            if self.use_cache:
+                # Write under a temporary name and move it into place, so a
+                # concurrent reader never opens a half-written file
+                tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+                try:
+                    data.to_parquet(tmp_path)
+                    os.replace(tmp_path, cache_path)
+                except Exception:
+                    # No Parquet engine, read-only folder or unsupported column
+                    if os.path.exists(tmp_path):
+                        try:
+                            os.remove(tmp_path)
+                        except OSError:
+                            pass
+                else:
+                    # Drop copies of older versions of this CSV
+                    for path in glob.glob(glob.escape(stem) + ".*.parquet"):
+                        if path != cache_path:
+                            try:
+                                os.remove(path)
+                            except OSError:
+                                pass
+
+        if self.price_dtype is not None:
+            columns = [col for col in PRICE_COLUMNS if col in data.columns]
+            data[columns] = data[columns].astype(self.price_dtype)
+
+        return data
+
+    def _list_folder(self, folder):
+        """
+        List (filename, mtime) pairs for a folder
+
+        Uses a single os.scandir pass (DirEntry caches the stat result)
+        and keeps the listing for the lifetime of this loader.
+        """
+        if folder not in self._dir_cache:
+            entries = []
+            with os.scandir(folder) as it:
+                for entry in it:
+                    if entry.is_file():
+                        entries.append((entry.name, entry.stat().st_mtime))
+            self._dir_cache[folder] = entries
+        return self._dir_cache[folder]
+
     def _find_file(self, ticker, start_date=None, end_date=None, category=None):
         """
         Find data file for a ticker
@@ -76,12 +176,14 @@ class DataLoader:
             if not os.path.exists(folder):
                 continue
 
-            search_path = os.path.join(folder, pattern)
-            files = glob.glob(search_path)
+            matches = [
+                (mtime, name) for name, mtime in self._list_folder(folder)
+                if fnmatch.fnmatch(name, pattern)
+            ]
 
-            if files:
+            if matches:
                 # Return most recent file if multiple matches
-                return max(files, key=os.path.getmtime)
+                return os.path.join(folder, max(matches)[1])
 
         return None
 
@@ -114,7 +216,7 @@ class DataLoader:
             return pd.DataFrame()
 
         try:
-            data = pd.read_csv(filepath, index_col=0, parse_dates=True)
+            data = self._read_data_file(filepath)
             return data
         except Exception as e:
             print(f"❌ Error loading {ticker}: {str(e)}")
@@ -160,20 +262,20 @@ class DataLoader:
             return {}
 
         files = glob.glob(os.path.join(NIFTY50_FOLDER, "*.csv"))
-        data_dict = {}
 
         print(f"Loading {len(files)} NIFTY 50 stocks...")
 
-        for filepath in files:
-            filename = os.path.basename(filepath)
-            # Extract ticker from filename (e.g., TCS_NS_2023-01-01_2023-12-31.csv)
-            ticker = filename.split('_')[0] + '.' + filename.split('_')[1]
+        # Size + mtime_ns of every CSV fingerprint the folder (the same
+        # stamp as the Parquet cache): any added, removed or rewritten CSV
+        # misses the in-process cache
+        fingerprint = []
+        for path in sorted(files):
+            stat = os.stat(path)
+            fingerprint.append((path, stat.st_size, stat.st_mtime_ns))
+        cached = _load_files(tuple(fingerprint), self.use_cache, self.price_dtype)
 
-            try:
-                data = pd.read_csv(filepath, index_col=0, parse_dates=True)
-                data_dict[ticker] = data
-            except Exception as e:
-                print(f"⚠ Error loading {filename}: {str(e)}")
+        # Cached frames are shared, hand out copies the caller may modify
+        data_dict = {ticker: data.copy() for ticker, data in cached.items()}
 
         print(f"✓ Loaded {len(data_dict)} stocks")
         return data_dict
@@ -217,6 +319,35 @@ class DataLoader:
 
         return sorted(list(tickers))
 
+###############################################################################
+# IN-PROCESS CACHE
+###############################################################################
+
+@lru_cache(maxsize=4)
+def _load_files(fingerprint, use_cache, price_dtype):
+    """
+    Load {ticker: DataFrame} for a tuple of (filepath, size, mtime_ns)
+
+    Memoised across DataLoader instances, so scripts and notebooks that
+    call load_all_nifty50() repeatedly only parse the files once per
+    version of the folder. Use _load_files.cache_clear() to drop it.
+    """
+    loader = DataLoader(use_cache=use_cache, price_dtype=price_dtype)
+    data_dict = {}
+
+    for filepath, _, _ in fingerprint:
+        filename = os.path.basename(filepath)
+        # Extract ticker from filename (e.g., TCS_NS_2023-01-01_2023-12-31.csv)
+        ticker = filename.split('_')[0] + '.' + filename.split('_')[1]
+
+        try:
+            data = loader._read_data_file(filepath)
+            data_dict[ticker] = data
+        except Exception as e:
+            print(f"⚠ Error loading {filename}: {str(e)}")
+
+    return data_dict
+
 ###############################################################################
 # CONVENIENCE FUNCTIONS
 ###############################################################################
@@ -17,12 +17,167 @@ from utills.market_regime import MarketRegimeDetector
 detector = MarketRegimeDetector()
 regime = detector.detect_regime(nifty_data)
 print(f"Current Regime: {regime['regime']}")
-print(f"Trend Strength: {regime['trend_strength']}")
+print(f"Trend Strength: {regime['trend_strength']:.2f}")
 """
 
+from itertools import product
+
 import pandas as pd
 import numpy as np
 
+# Base regimes detect_regime can report (each may get a '_VOLATILE' suffix)
+REGIME_NAMES = ['UNKNOWN', 'BULL_TRENDING', 'BULL_WEAK',
+                'BEAR_TRENDING', 'BEAR_WEAK', 'SIDEWAYS']
+VOLATILITY_STATES = ['HIGH', 'NORMAL', 'LOW', 'UNKNOWN']
+STRATEGY_TYPES = ['momentum', 'mean_reversion', 'combined']
+
+###############################################################################
+# ARRAY KERNELS
+###############################################################################
+
+def _rolling_mean(values, window):
+    """
+    Trailing simple moving average of a 1-D array
+
+    Same result as pandas rolling(window).mean(): NaN until the window is
+    full and for any window holding a NaN/inf. Uses running sums, so the
+    cost is one pass regardless of window size.
+    """
+    values = np.asarray(values)
+    out = np.full(values.shape, np.nan)
+    if len(values) < window:
+        return out
+
+    # Accumulate in float64 whatever the input dtype, so long histories
+    # don't drift
+    missing = ~np.isfinite(values)
+    sums = np.cumsum(np.where(missing, 0, values), dtype=np.float64)
+    counts = np.cumsum(missing)
+
+    window_sums = sums[window - 1:].copy()
+    window_sums[1:] -= sums[:-window]
+    window_missing = counts[window - 1:].copy()
+    window_missing[1:] -= counts[:-window]
+
+    out[window - 1:] = np.where(window_missing == 0, window_sums / window, np.nan)
+    return out
+
+
+def _directional_movement(high, low):
+    """
+    +DM and -DM from positional high/low arrays
+
+    The first bar has no previous bar and gets 0 for both.
+    """
+    up_move = np.zeros_like(high)
+    down_move = np.zeros_like(low)
+    up_move[1:] = high[1:] - high[:-1]
+    down_move[1:] = low[:-1] - low[1:]
+
+    plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
+    minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
+    return plus_dm, minus_dm
+
+
+def _previous(values):
+    """Array shifted one bar forward; the first bar has no previous value (NaN)"""
+    prev = np.empty_like(values)
+    if len(values):
+        prev[0] = np.nan
+        prev[1:] = values[:-1]
+    return prev
+
+
+def _true_range(high, low, prev_close):
+    """
+    True range from positional high/low/previous-close arrays
+
+    Where there is no previous close (NaN) it falls back to high - low.
+    """
+    # fmax skips a NaN previous close
+    return np.fmax.reduce([high - low, np.abs(high - prev_close), np.abs(low - prev_close)])
+
+
+def _adx_kernel(high, low, prev_close, period):
+    """
+    ATR, +DI, -DI and ADX from positional high/low/previous-close arrays
+
+    All outputs are ndarrays aligned with the inputs.
+    """
+    tr = _true_range(high, low, prev_close)
+    plus_dm, minus_dm = _directional_movement(high, low)
+    atr = _rolling_mean(tr, period)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        plus_di = 100 * _rolling_mean(plus_dm, period) / atr
+        minus_di = 100 * _rolling_mean(minus_dm, period) / atr
+        dx = 100 * np.abs(plus_di - minus_di) / (plus_di + minus_di)
+
+    adx = _rolling_mean(dx, period)
+    return atr, plus_di, minus_di, adx
+
+
+def _regime_kernel(high, low, close, prev_close, sma_short, sma_long, adx_period):
+    """
+    Latest value of every trend indicator detect_regime reads
+
+    Each of them has a finite trailing window, so only the last
+    max(sma_long, 2 * adx_period) bars are touched (ADX needs 2 * period
+    bars of TR) and scalars are returned instead of full series.
+
+    Returns: (price, sma_short, sma_long, adx, plus_di, minus_di)
+    """
+    tail = slice(-2 * adx_period, None)
+    _, plus_di, minus_di, adx = _adx_kernel(high[tail], low[tail], prev_close[tail], adx_period)
+
+    return (close[-1],
+            close[-sma_short:].mean(dtype=np.float64),
+            close[-sma_long:].mean(dtype=np.float64),
+            adx[-1],
+            plus_di[-1],
+            minus_di[-1])
+
+
+def _volatility(close, prev_close, period):
+    """Annualised rolling volatility (%) of close-to-close returns"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = close / prev_close - 1
+
+    # One std over a (n - period + 1, period) strided view instead of the
+    # generic rolling engine; a NaN anywhere in a window gives NaN, as
+    # rolling(period).std() does. NaN-padded in front to stay aligned.
+    volatility = np.full(len(returns), np.nan)
+    if len(returns) >= period:
+        windows = np.lib.stride_tricks.sliding_window_view(returns, period)
+        with np.errstate(invalid='ignore'):
+            volatility[period - 1:] = windows.std(axis=-1, ddof=1, dtype=np.float64)
+    return volatility * np.sqrt(252) * 100
+
+
+def _sorted_percentile(sorted_values, value):
+    """
+    Percentile (0-100) of a value that is contained in a sorted array
+
+    Same as pandas rank(pct=True) for that element: ties share their
+    average rank. Two binary searches instead of ranking the whole array.
+    """
+    left = np.searchsorted(sorted_values, value, side='left')
+    right = np.searchsorted(sorted_values, value, side='right')
+    return (left + 1 + right) / 2 / len(sorted_values) * 100
+
+
+def _prepare_arrays(data, dtype=np.float64):
+    """
+    High, low and close of an OHLC frame as contiguous ndarrays
+
+    Called once at the API boundary; the kernels above only see these.
+    """
+    return tuple(
+        np.ascontiguousarray(data[col].to_numpy(dtype=dtype))
+        for col in ('High', 'Low', 'Close')
+    )
+
+
 class MarketRegimeDetector:
     """Detect market regime using multiple indicators"""
 
@@ -31,10 +186,40 @@ class MarketRegimeDetector:
         self.sma_200 = 200
         self.adx_period = 14
         self.atr_period = 14
+        self.vol_period = 20
+        # dtype of the price arrays. np.float32 halves memory traffic, but the
+        # +DM/-DM comparisons can flip on near-equal moves and shift ADX;
+        # sums/means accumulate in float64 either way
+        self.dtype = np.float64
+        # Sorted volatility history of the last frame seen by detect_regime,
+        # so a frame that only adds one bar doesn't rebuild it
+        self._vol_state = None
+        # (data, key, result) of the last detect_regime call
+        self._regime_cache = None
+
+        # Every regime detect_regime can return, so should_trade and
+        # get_position_size_multiplier are one dict lookup per call
+        regimes = [base + suffix
+                   for base in REGIME_NAMES
+                   for suffix in ('', '_VOLATILE')]
+        self._size_table = {
+            (regime, vol): self._size_rule(regime, vol)
+            for regime, vol in product(regimes, VOLATILITY_STATES)
+        }
+        self._trade_table = {
+            (regime, strategy, vol): self._trade_rule(regime, strategy, vol)
+            for regime, strategy, vol in product(regimes, STRATEGY_TYPES, VOLATILITY_STATES)
+        }
+
+    def invalidate(self):
+        """Drop cached state (call after editing a frame's values in place)"""
+        self._vol_state = None
+        self._regime_cache = None
 
     def calculate_sma(self, data, period):
         """Calculate Simple Moving Average"""
-        return data['Close'].rolling(window=period).mean()
+        close = data['Close'].to_numpy(dtype=self.dtype)
+        return pd.Series(_rolling_mean(close, period), index=data.index)
 
     def calculate_adx(self, data, period=14):
         """
@@ -45,56 +230,74 @@ class MarketRegimeDetector:
         ADX 25-50: Strong trend
         ADX > 50: Very strong trend
         """
-        high = data['High']
-        low = data['Low']
-        close = data['Close']
-
-        # True Range
-        tr1 = high - low
-        tr2 = abs(high - close.shift(1))
-        tr3 = abs(low - close.shift(1))
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+        high, low, close = _prepare_arrays(data, self.dtype)
+        _, plus_di, minus_di, adx = _adx_kernel(high, low, _previous(close), period)
 
-        # Directional Movement
-        up_move = high - high.shift(1)
-        down_move = low.shift(1) - low
-
-        plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0)
-        minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0)
-
-        # Smoothed indicators
-        atr = tr.rolling(window=period).mean()
-        plus_di = 100 * pd.Series(plus_dm).rolling(window=period).mean() / atr
-        minus_di = 100 * pd.Series(minus_dm).rolling(window=period).mean() / atr
-
-        # ADX calculation
-        dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
-        adx = dx.rolling(window=period).mean()
-
-        return adx, plus_di, minus_di
+        index = data.index
+        return (pd.Series(adx, index=index),
+                pd.Series(plus_di, index=index),
+                pd.Series(minus_di, index=index))
 
     def calculate_atr(self, data, period=14):
         """
         Calculate Average True Range (ATR)
         Measures volatility
         """
-        high = data['High']
-        low = data['Low']
-        close = data['Close']
-
-        tr1 = high - low
-        tr2 = abs(high - close.shift(1))
-        tr3 = abs(low - close.shift(1))
-        tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-
-        atr = tr.rolling(window=period).mean()
-        return atr
+        high, low, close = _prepare_arrays(data, self.dtype)
+        tr = _true_range(high, low, _previous(close))
+        return pd.Series(_rolling_mean(tr, period), index=data.index)
 
     def calculate_volatility(self, data, period=20):
         """Calculate historical volatility (standard deviation of returns)"""
-        returns = data['Close'].pct_change()
-        volatility = returns.rolling(window=period).std() * np.sqrt(252) * 100  # Annualized
-        return volatility
+        close = data['Close'].to_numpy(dtype=self.dtype)
+        return pd.Series(_volatility(close, _previous(close), period), index=data.index)
+
+    def _volatility_percentile(self, index, close, prev_close):
+        """
+        Latest annualised volatility and its percentile in the history
+
+        If the bars are the ones seen on the previous call plus one new bar
+        (live trading / bar-by-bar backtests), only the new volatility value
+        is computed and inserted into the cached sorted history. Anything
+        else, including a changed vol_period or dtype, rebuilds the history
+        from scratch.
+
+        Returns: (current_volatility, percentile 0-100)
+        """
+        period = self.vol_period
+        state = self._vol_state
+
+        if (state is not None
+                and state['period'] == period
+                and state['dtype'] == close.dtype
+                and len(close) == state['n_bars'] + 1
+                and index[0] == state['first_index']
+                and index[-2] == state['last_index']
+                and close[-2] == state['last_close']):
+            current = _volatility(close[-period:], prev_close[-period:], period)[-1]
+            history = state['history']
+            if not np.isnan(current):
+                history = np.insert(history, np.searchsorted(history, current), current)
+        else:
+            volatility = _volatility(close, prev_close, period)
+            current = volatility[-1]
+            history = np.sort(volatility[~np.isnan(volatility)])
+
+        percentile = np.nan
+        if not np.isnan(current):
+            # A lone value ranks at the top of its own history
+            percentile = 100.0 if len(history) < 2 else _sorted_percentile(history, current)
+
+        self._vol_state = {
+            'period': period,
+            'dtype': close.dtype,
+            'n_bars': len(close),
+            'first_index': index[0],
+            'last_index': index[-1],
+            'last_close': close[-1],
+            'history': history
+        }
+        return current, percentile
 
     def detect_regime(self, data):
         """
@@ -108,7 +311,36 @@ class MarketRegimeDetector:
         - volatility_state: 'HIGH', 'NORMAL', 'LOW'
         - is_tradeable: bool (whether conditions are good for trading)
         - confidence: 0-100 (confidence in regime detection)
+
+        Calling again with the same, unchanged frame and settings returns
+        the cached result. The cache keeps a reference to the frame, so its id can't
+        be reused by another object while cached.
         """
+        # Settings are part of the key, so changing e.g. sma_200 or dtype
+        # on the detector recomputes instead of returning the old result
+        settings = (self.sma_50, self.sma_200, self.adx_period,
+                    self.vol_period, np.dtype(self.dtype))
+        key = (len(data), data.index[-1] if len(data) else None, settings)
+        cache = self._regime_cache
+        if cache is not None and cache[0] is data and cache[1] == key:
+            return self._copy_result(cache[2])
+
+        result = self._detect_regime(data)
+        self._regime_cache = (data, key, result)
+        return self._copy_result(result)
+
+    @staticmethod
+    def _copy_result(result):
+        """Copy of a cached result that callers can modify freely"""
+        copy = dict(result)
+        if 'recommendations' in copy:
+            copy['recommendations'] = list(copy['recommendations'])
+        return copy
+
+    def _detect_regime(self, data):
+        """Uncached body of detect_regime"""
+        # Bail out before touching any indicator while the 200-day SMA
+        # can't be filled yet (the warm-up bars of a backtest)
         if data.empty or len(data) < self.sma_200:
             return {
                 'regime': 'UNKNOWN',
@@ -119,21 +351,18 @@ class MarketRegimeDetector:
                 'details': 'Insufficient data'
             }
 
-        # Calculate indicators
-        sma_50 = self.calculate_sma(data, self.sma_50)
-        sma_200 = self.calculate_sma(data, self.sma_200)
-        adx, plus_di, minus_di = self.calculate_adx(data, self.adx_period)
-        atr = self.calculate_atr(data, self.atr_period)
-        volatility = self.calculate_volatility(data, period=20)
-
-        # Get latest values
-        current_price = data['Close'].iloc[-1]
-        current_sma_50 = sma_50.iloc[-1]
-        current_sma_200 = sma_200.iloc[-1]
-        current_adx = adx.iloc[-1]
-        current_plus_di = plus_di.iloc[-1]
-        current_minus_di = minus_di.iloc[-1]
-        current_volatility = volatility.iloc[-1]
+        # Calculate indicators: trend values in one tail-only kernel call,
+        # volatility through the incremental history cache. The shifted
+        # close is shared by TR and returns.
+        high, low, close = _prepare_arrays(data, self.dtype)
+        prev_close = _previous(close)
+        (current_price, current_sma_50, current_sma_200,
+         current_adx, current_plus_di, current_minus_di) = _regime_kernel(
+            high, low, close, prev_close, self.sma_50, self.sma_200, self.adx_period
+        )
+        current_volatility, vol_percentile = self._volatility_percentile(
+            data.index, close, prev_close
+        )
 
         # Skip if any indicator is NaN
         if pd.isna(current_adx) or pd.isna(current_sma_50) or pd.isna(current_sma_200):
@@ -178,9 +407,7 @@ class MarketRegimeDetector:
         ###################################################################
         # VOLATILITY STATE
         ###################################################################
-        # Calculate percentile of current volatility
-        vol_percentile = (volatility.rank(pct=True).iloc[-1]) * 100
-
+        # vol_percentile: percentile of current volatility in its history
         if vol_percentile > 75:
             volatility_state = 'HIGH'
         elif vol_percentile < 25:
@@ -257,45 +484,76 @@ class MarketRegimeDetector:
             recommendations.append("✓ Can increase position sizes")
             recommendations.append("✓ Tighter stop-losses acceptable")
 
+        # Plain floats, unrounded: round at display time (f"{x:.2f}")
         return {
             'regime': regime,
             'trend_direction': trend_direction,
-            'trend_strength': round(trend_strength, 2),
-            'adx': round(current_adx, 2),
-            'plus_di': round(current_plus_di, 2),
-            'minus_di': round(current_minus_di, 2),
+            'trend_strength': float(trend_strength),
+            'adx': float(current_adx),
+            'plus_di': float(current_plus_di),
+            'minus_di': float(current_minus_di),
             'volatility_state': volatility_state,
-            'volatility_annual': round(current_volatility, 2),
-            'price': round(current_price, 2),
-            'sma_50': round(current_sma_50, 2),
-            'sma_200': round(current_sma_200, 2),
+            'volatility_annual': float(current_volatility),
+            'price': float(current_price),
+            'sma_50': float(current_sma_50),
+            'sma_200': float(current_sma_200),
             'is_tradeable': is_tradeable,
-            'confidence': round(confidence, 2),
+            'confidence': float(confidence),
             'recommendations': recommendations
         }
 
-    def get_position_size_multiplier(self, regime_info):
-        """
-        Get position size multiplier based on market regime
-
-        Returns: float (0.5 to 1.5)
-        """
+    @staticmethod
+    def _size_rule(regime, volatility_state):
+        """Position size multiplier for a regime / volatility state pair"""
         multiplier = 1.0
 
         # Reduce in bear markets
-        if 'BEAR' in regime_info['regime']:
+        if 'BEAR' in regime:
             multiplier *= 0.5
 
         # Reduce in high volatility
-        if regime_info['volatility_state'] == 'HIGH':
+        if volatility_state == 'HIGH':
             multiplier *= 0.7
 
         # Increase in strong bull with low volatility
-        if regime_info['regime'] == 'BULL_TRENDING' and regime_info['volatility_state'] == 'LOW':
+        if regime == 'BULL_TRENDING' and volatility_state == 'LOW':
             multiplier *= 1.3
 
         return round(multiplier, 2)
 
+    @staticmethod
+    def _trade_rule(regime, strategy_type, volatility_state):
+        """Reason the regime rules out this strategy type, or None"""
+        # Never trade in bear markets with momentum
+        if 'BEAR' in regime and strategy_type == 'momentum':
+            return "Bear market - avoid momentum strategies"
+
+        # Don't trade sideways markets with momentum
+        if regime == 'SIDEWAYS' and strategy_type == 'momentum':
+            return "Sideways market - momentum not effective"
+
+        # Don't trade trending markets with mean-reversion
+        if 'TRENDING' in regime and strategy_type == 'mean_reversion':
+            return "Strong trend - mean-reversion risky"
+
+        # Reduce trading in high volatility
+        if volatility_state == 'HIGH':
+            return "High volatility - wait for stability"
+
+        return None
+
+    def get_position_size_multiplier(self, regime_info):
+        """
+        Get position size multiplier based on market regime
+
+        Returns: float (0.5 to 1.5)
+        """
+        key = (regime_info['regime'], regime_info['volatility_state'])
+        try:
+            return self._size_table[key]
+        except KeyError:
+            return self._size_rule(*key)
+
     def should_trade(self, regime_info, strategy_type='momentum'):
         """
         Determine if should trade based on regime and strategy type
@@ -309,23 +567,14 @@ class MarketRegimeDetector:
         --------
         bool, str (should_trade, reason)
         """
-        regime = regime_info['regime']
+        key = (regime_info['regime'], strategy_type, regime_info['volatility_state'])
+        try:
+            reason = self._trade_table[key]
+        except KeyError:
+            reason = self._trade_rule(*key)
 
-        # Never trade in bear markets with momentum
-        if 'BEAR' in regime and strategy_type == 'momentum':
-            return False, "Bear market - avoid momentum strategies"
-
-        # Don't trade sideways markets with momentum
-        if regime == 'SIDEWAYS' and strategy_type == 'momentum':
-            return False, "Sideways market - momentum not effective"
-
-        # Don't trade trending markets with mean-reversion
-        if 'TRENDING' in regime and strategy_type == 'mean_reversion':
-            return False, "Strong trend - mean-reversion risky"
-
-        # Reduce trading in high volatility
-        if regime_info['volatility_state'] == 'HIGH':
-            return False, "High volatility - wait for stability"
+        if reason is not None:
+            return False, reason
 
         # Low confidence
         if regime_info['confidence'] < 50:
@@ -377,10 +626,10 @@ if __name__ == "__main__":
         print("=" * 80)
         print(f"Regime: {regime_info['regime']}")
         print(f"Trend Direction: {regime_info['trend_direction']}")
-        print(f"Trend Strength (ADX): {regime_info['adx']} / 100")
-        print(f"Volatility State: {regime_info['volatility_state']} ({regime_info['volatility_annual']}% annual)")
+        print(f"Trend Strength (ADX): {regime_info['adx']:.2f} / 100")
+        print(f"Volatility State: {regime_info['volatility_state']} ({regime_info['volatility_annual']:.2f}% annual)")
         print(f"Tradeable: {'YES' if regime_info['is_tradeable'] else 'NO'}")
-        print(f"Confidence: {regime_info['confidence']}%")
+        print(f"Confidence: {regime_info['confidence']:.2f}%")
 
         print(f"\n📈 TECHNICAL LEVELS")
         print("=" * 80)